@@ -20,6 +20,8 @@ The addon will:
   * main_*.exr: Beauty and lighting passes (16-bit)
   * data_*.exr: Data passes (normal, depth, position, motion)
   * crypto_*.exr: Cryptomatte passes (object, material, asset)
+  With "Single EXR" enabled, all passes go into one aovs_*.exr instead, all
+  of them at 32-bit (multilayer files can't mix bit depths per layer).
 
 Output Structure:
 main_*.exr:
@@ -62,16 +64,175 @@ bl_info = {
     "category": "Render",
 }
 
+import hashlib
+
 import bpy
+from bpy.props import BoolProperty, EnumProperty
 from bpy.types import Operator, Panel
 
+# Lossless EXR compression codecs, safe for data and Cryptomatte passes
+LOSSLESS_EXR_CODEC_ITEMS = [
+    ('NONE', "None", "No compression (fastest to encode, largest files)"),
+    ('ZIP', "ZIP", "Lossless zip compression of 16-scanline blocks"),
+    ('PIZ', "PIZ", "Lossless wavelet compression, good for noisy or smooth float data"),
+]
+
+# All EXR compression codecs, including the lossy ones for beauty/lighting passes
+EXR_CODEC_ITEMS = LOSSLESS_EXR_CODEC_ITEMS + [
+    ('DWAA', "DWAA", "Lossy DCT compression in 32-scanline blocks"),
+    ('DWAB', "DWAB", "Lossy DCT compression in 256-scanline blocks"),
+]
+
+# Main AOV slots as (slot name, Render Layers output, denoise node label).
+# rgba is fed through the Set Alpha node and shadow is left unconnected.
+MAIN_SLOTS = (
+    ("rgba", None, None),
+    ("diffuseDirect", 'DiffDir', None),
+    ("diffuseIndirect", 'DiffInd', "Denoise Diffuse Indirect"),
+    ("diffuseColor", 'DiffCol', None),
+    ("specularDirect", 'GlossDir', None),
+    ("specularIndirect", 'GlossInd', "Denoise Specular Indirect"),
+    ("specularColor", 'GlossCol', None),
+    ("transmissionDirect", 'TransDir', None),
+    ("transmissionIndirect", 'TransInd', "Denoise Transmission Indirect"),
+    ("transmissionColor", 'TransCol', None),
+    ("emission", 'Emit', None),
+    ("background", 'Env', None),
+    ("shadow", None, None),
+    ("ao", 'AO', None),
+)
+
+# MAIN_SLOTS split by how each slot is linked, resolved once at import:
+# (Render Layers output, slot name) for passes linked straight through, and
+# (Render Layers output, slot name, denoise label) for denoised passes
+MAIN_DIRECT = tuple(
+    (output_name, slot_name)
+    for slot_name, output_name, denoise_label in MAIN_SLOTS
+    if output_name and not denoise_label
+)
+MAIN_DENOISED = tuple(
+    (output_name, slot_name, denoise_label)
+    for slot_name, output_name, denoise_label in MAIN_SLOTS
+    if denoise_label
+)
+
+# Data AOV slots as (slot name, Render Layers output)
+DATA_SLOTS = (
+    ("normal", 'Normal'),
+    ("depth", 'Depth'),
+    ("position", 'Position'),
+    ("motion", 'Vector'),
+)
+
+# Cryptomatte slots: the base layers fed from the main image, and the numbered
+# layers linked from the matching Render Layers output
+CRYPTO_BASE = ("CryptoObject", "CryptoMaterial", "CryptoAsset")
+CRYPTO_NUMBERED = tuple(f"{base}{i:02d}" for i in range(3) for base in CRYPTO_BASE)
+
+# View layer passes the operator enables, as the suffix of their use_pass_* flag
+PASSES = (
+    # Main AOVs (beauty and lighting)
+    'combined', 'diffuse_direct', 'diffuse_indirect', 'diffuse_color',
+    'glossy_direct', 'glossy_indirect', 'glossy_color',
+    'transmission_direct', 'transmission_indirect', 'transmission_color',
+    'emit', 'environment', 'shadow', 'ambient_occlusion',
+    # Data AOVs (normal, depth, position, motion)
+    'normal', 'z', 'position', 'vector',
+    # Cryptomatte AOVs
+    'cryptomatte_object', 'cryptomatte_material', 'cryptomatte_asset',
+)
+
+# Cycles view layer flags the operator enables for the denoise nodes
+DENOISING_FLAGS = ('denoising_store_passes', 'use_denoising', 'use_pass_denoising_data')
+
+def _compute_fingerprint(view_layer, scene, settings):
+    """Summarize the render engine, enabled passes and compositor outputs of a scene.
+
+    Two equal fingerprints mean the operator would not change anything, so a
+    re-run can return early instead of rebuilding the node tree.
+    """
+    passes = "".join('1' if getattr(view_layer, "use_pass_" + p) else '0' for p in PASSES)
+    denoising = "".join('1' if getattr(view_layer.cycles, flag) else '0' for flag in DENOISING_FLAGS)
+    node_tree = scene.node_tree if scene.use_nodes else None
+    if node_tree is None:
+        tree_state = "no-nodes"
+    else:
+        outputs = [
+            (n.label, n.base_path, n.format.file_format, n.format.color_depth,
+             n.format.exr_codec, [slot.path for slot in n.file_slots])
+            for n in node_tree.nodes if n.type == 'OUTPUT_FILE'
+        ]
+        connections = sorted(
+            (l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier)
+            for l in node_tree.links
+        )
+        # Hashed so the value stored on the scene stays short
+        tree_digest = hashlib.md5(repr((outputs, connections)).encode()).hexdigest()
+        tree_state = f"{len(node_tree.nodes)}:{tree_digest}"
+    return (
+        f"{scene.render.engine}|{view_layer.name}|{passes}|{denoising}|"
+        f"{tree_state}|{sorted(settings.items())}"
+    )
+
+def _new_file_output(nodes, base_path, location, label, color_depth, exr_codec):
+    """Add a multilayer EXR File Output node with its default slots removed."""
+    output_node = nodes.new(type="CompositorNodeOutputFile")
+    output_node.location = location
+    output_node.base_path = base_path
+    output_node.format.file_format = 'OPEN_EXR_MULTILAYER'
+    output_node.format.exr_codec = exr_codec
+    output_node.format.color_depth = color_depth
+    output_node.format.color_mode = 'RGBA'
+    output_node.label = label
+    output_node.file_slots.clear()
+    return output_node
+
+def _new_slot_socket(output_node, slot_name):
+    """Add a file slot to a File Output node and return the input socket it created."""
+    output_node.file_slots.new(slot_name)
+    return output_node.inputs[-1]
+
 class AOVSETUP_OT_setup_aovs(Operator):
     """Set up Main (16-bit) and Data/Cryptomatte (32-bit) AOVs with VFX naming"""
     bl_idname = "aovsetup.setup_aovs"
     bl_label = "Setup VFX AOVs"
     bl_options = {'REGISTER', 'UNDO'}
 
+    main_codec: EnumProperty(
+        name="Main Codec",
+        items=EXR_CODEC_ITEMS,
+        default='DWAA',
+        description="EXR compression for the beauty and lighting passes"
+    )
+
+    data_codec: EnumProperty(
+        name="Data Codec",
+        items=LOSSLESS_EXR_CODEC_ITEMS,
+        default='PIZ',
+        description="EXR compression for the data passes"
+    )
+
+    crypto_codec: EnumProperty(
+        name="Cryptomatte Codec",
+        items=LOSSLESS_EXR_CODEC_ITEMS,
+        default='ZIP',
+        description="EXR compression for the Cryptomatte passes"
+    )
+
+    unified_output: BoolProperty(
+        name="Single EXR",
+        default=False,
+        description="Write all passes into one 32-bit multilayer EXR per frame instead of main, data and crypto files"
+    )
+
     def execute(self, context):
+        # Skip the rebuild if the scene is still exactly as we left it
+        settings = self.as_keywords()
+        fingerprint = _compute_fingerprint(context.view_layer, context.scene, settings)
+        if context.scene.get('_aov_fingerprint') == fingerprint:
+            self.report({'INFO'}, "VFX AOVs already set up")
+            return {'FINISHED'}
+
         # Ensure Cycles is active (required for Cryptomatte)
         if context.scene.render.engine != 'CYCLES':
             context.scene.render.engine = 'CYCLES'
@@ -80,45 +241,29 @@ class AOVSETUP_OT_setup_aovs(Operator):
         # Get the current view layer
         view_layer = context.view_layer
 
-        # --- Main AOVs (Beauty and Lighting Passes) ---
-        view_layer.use_pass_combined = True  # beauty
-        view_layer.use_pass_diffuse_direct = True   # diffuseDirect
-        view_layer.use_pass_diffuse_indirect = True # diffuseIndirect
-        view_layer.use_pass_diffuse_color = True    # diffuseColor
-        view_layer.use_pass_glossy_direct = True    # specularDirect
-        view_layer.use_pass_glossy_indirect = True  # specularIndirect
-        view_layer.use_pass_glossy_color = True     # specularColor
-        view_layer.use_pass_transmission_direct = True    # transmissionDirect
-        view_layer.use_pass_transmission_indirect = True  # transmissionIndirect
-        view_layer.use_pass_transmission_color = True     # transmissionColor
-        view_layer.use_pass_emit = True  # emission
-        view_layer.use_pass_environment = True  # background
-        view_layer.use_pass_shadow = True    # shadow
-        view_layer.use_pass_ambient_occlusion = True  # ao
-        
-        # Enable denoising data passes
-        view_layer.cycles.denoising_store_passes = True
-        view_layer.cycles.use_denoising = True
-        view_layer.cycles.use_pass_denoising_data = True
-
-        # --- Data AOVs (Utility Passes) ---
-        view_layer.use_pass_normal = True    # normal
-        view_layer.use_pass_z = True         # depth
-        view_layer.use_pass_position = True  # position
-        view_layer.use_pass_vector = True    # motion
+        # Enable Main, Data and Cryptomatte passes, only writing the flags
+        # that actually change so already-enabled passes don't retag the depsgraph
+        for pass_name in PASSES:
+            attr = "use_pass_" + pass_name
+            if not getattr(view_layer, attr):
+                setattr(view_layer, attr, True)
 
-        # --- Cryptomatte AOVs ---
-        view_layer.use_pass_cryptomatte_object = True   # cryptoObject
-        view_layer.use_pass_cryptomatte_material = True # cryptoMaterial
-        view_layer.use_pass_cryptomatte_asset = True    # cryptoAsset
+        # Enable denoising data passes
+        cycles_settings = view_layer.cycles
+        for flag in DENOISING_FLAGS:
+            if not getattr(cycles_settings, flag):
+                setattr(cycles_settings, flag, True)
 
         # --- Compositor Setup ---
         scene = context.scene
         scene.use_nodes = True
-        nodes = scene.node_tree.nodes
-        links = scene.node_tree.links
+        node_tree = scene.node_tree
+        nodes = node_tree.nodes
+        links = node_tree.links
 
-        # Clear existing nodes
+        # Clear existing links first so removing the nodes doesn't have to
+        # resolve them one node at a time
+        links.clear()
         nodes.clear()
 
         # Add Render Layers node
@@ -126,164 +271,137 @@ class AOVSETUP_OT_setup_aovs(Operator):
         render_layers.location = (0, 0)
         render_layers.label = "View Layer"
 
-        # --- File Output for Main AOVs (16-bit) ---
-        main_output = nodes.new(type="CompositorNodeOutputFile")
-        main_output.location = (400, 200)
-        main_output.base_path = "//renders/main.####.exr"  # e.g., main_0001.exr
-        main_output.format.file_format = 'OPEN_EXR_MULTILAYER'
-        main_output.format.color_depth = '16'  # 16-bit float (half)
-        main_output.format.color_mode = 'RGBA'
-        main_output.label = "Main Passes (16-bit)"
-
-        # Clear default slots and add Main AOVs
-        main_output.file_slots.clear()
-        main_output.file_slots.new("rgba")
-        main_output.file_slots.new("diffuseDirect")
-        main_output.file_slots.new("diffuseIndirect")
-        main_output.file_slots.new("diffuseColor")
-        main_output.file_slots.new("specularDirect")
-        main_output.file_slots.new("specularIndirect")
-        main_output.file_slots.new("specularColor")
-        main_output.file_slots.new("transmissionDirect")
-        main_output.file_slots.new("transmissionIndirect")
-        main_output.file_slots.new("transmissionColor")
-        main_output.file_slots.new("emission")
-        main_output.file_slots.new("background")
-        main_output.file_slots.new("shadow")
-        main_output.file_slots.new("ao")
+        # --- File Output nodes ---
+        if self.unified_output:
+            # One 32-bit file for every pass so data and Cryptomatte layers keep
+            # full precision; it must stay lossless for the Cryptomatte IDs
+            aov_output = _new_file_output(
+                nodes, "//renders/aovs.####.exr", (400, 0),
+                "All Passes (32-bit)", '32', self.crypto_codec
+            )
+            main_output = data_output = crypto_output = aov_output
+        else:
+            main_output = _new_file_output(
+                nodes, "//renders/main.####.exr", (400, 200),  # e.g., main_0001.exr
+                "Main Passes (16-bit)", '16', self.main_codec  # 16-bit float (half)
+            )
+            data_output = _new_file_output(
+                nodes, "//renders/data.####.exr", (400, -200),
+                "Data Passes (32-bit)", '32', self.data_codec  # 32-bit float (full)
+            )
+            crypto_output = _new_file_output(
+                nodes, "//renders/crypto.####.exr", (400, -400),
+                "Cryptomatte Passes (32-bit)", '32', self.crypto_codec  # 32-bit float (full)
+            )
+
+        # --- Main AOVs (16-bit, or 32-bit in the single EXR) ---
+        main_sockets = {
+            slot_name: _new_slot_socket(main_output, slot_name)
+            for slot_name, _, _ in MAIN_SLOTS
+        }
 
         # Add Set Alpha node for the main RGBA output
         set_alpha = nodes.new(type="CompositorNodeSetAlpha")
         set_alpha.location = (200, 200)
         set_alpha.label = "Set Alpha for RGBA"
-        
-        # Connect Image to Set Alpha node
-        links.new(render_layers.outputs['Image'], set_alpha.inputs['Image'])
-        
-        # If Alpha output exists, connect it to the Set Alpha node
-        if 'Alpha' in render_layers.outputs:
-            links.new(render_layers.outputs['Alpha'], set_alpha.inputs['Alpha'])
-        
-        # Link Set Alpha output to the rgba input
-        links.new(set_alpha.outputs['Image'], main_output.inputs['rgba'])
-        
-        # Link other Main AOVs
-        links.new(render_layers.outputs['DiffDir'], main_output.inputs['diffuseDirect'])
-        
+
         # Add denoise nodes for indirect passes
-        denoise_diff_ind = nodes.new(type="CompositorNodeDenoise")
-        denoise_diff_ind.location = (200, 100)
-        denoise_diff_ind.label = "Denoise Diffuse Indirect"
-        
-        denoise_gloss_ind = nodes.new(type="CompositorNodeDenoise")
-        denoise_gloss_ind.location = (200, 0)
-        denoise_gloss_ind.label = "Denoise Specular Indirect"
-        
-        denoise_trans_ind = nodes.new(type="CompositorNodeDenoise")
-        denoise_trans_ind.location = (200, -100)
-        denoise_trans_ind.label = "Denoise Transmission Indirect"
-        
-        # Debug: Print available outputs to help identify the correct names
-        output_names = [output.name for output in render_layers.outputs]
-        print("Available outputs:", output_names)
-        
-        # Connect denoising data to all denoise nodes
-        denoising_albedo = None
-        denoising_normal = None
-        
-        # Find the correct denoising output names
-        for name in output_names:
-            if "denoising" in name.lower() and "albedo" in name.lower():
-                denoising_albedo = name
-            if "denoising" in name.lower() and "normal" in name.lower():
-                denoising_normal = name
-        
-        # Connect denoising data if found
-        if denoising_albedo and denoising_normal:
-            for denoise_node in [denoise_diff_ind, denoise_gloss_ind, denoise_trans_ind]:
-                links.new(render_layers.outputs[denoising_albedo], denoise_node.inputs['Albedo'])
-                links.new(render_layers.outputs[denoising_normal], denoise_node.inputs['Normal'])
-        
-        # Link indirect passes through denoise nodes
-        links.new(render_layers.outputs['DiffInd'], denoise_diff_ind.inputs['Image'])
-        links.new(denoise_diff_ind.outputs['Image'], main_output.inputs['diffuseIndirect'])
-        
-        links.new(render_layers.outputs['GlossInd'], denoise_gloss_ind.inputs['Image'])
-        links.new(denoise_gloss_ind.outputs['Image'], main_output.inputs['specularIndirect'])
-        
-        links.new(render_layers.outputs['TransInd'], denoise_trans_ind.inputs['Image'])
-        links.new(denoise_trans_ind.outputs['Image'], main_output.inputs['transmissionIndirect'])
-        
-        # Link direct passes directly
-        links.new(render_layers.outputs['GlossDir'], main_output.inputs['specularDirect'])
-        links.new(render_layers.outputs['TransDir'], main_output.inputs['transmissionDirect'])
-        links.new(render_layers.outputs['Emit'], main_output.inputs['emission'])
-        links.new(render_layers.outputs['Env'], main_output.inputs['background'])
-        links.new(render_layers.outputs['AO'], main_output.inputs['ao'])
-        
-        # Link color passes
-        links.new(render_layers.outputs['DiffCol'], main_output.inputs['diffuseColor'])
-        links.new(render_layers.outputs['GlossCol'], main_output.inputs['specularColor'])
-        links.new(render_layers.outputs['TransCol'], main_output.inputs['transmissionColor'])
-
-        # --- File Output for Data AOVs (32-bit) ---
-        data_output = nodes.new(type="CompositorNodeOutputFile")
-        data_output.location = (400, -200)
-        data_output.base_path = "//renders/data.####.exr"  # Use same base name for all outputs
-        data_output.format.file_format = 'OPEN_EXR_MULTILAYER'
-        data_output.format.color_depth = '32'  # 32-bit float (full)
-        data_output.format.color_mode = 'RGBA'
-        data_output.label = "Data Passes (32-bit)"
-
-        # Clear default slots and add Data AOVs
-        data_output.file_slots.clear()
-        data_output.file_slots.new("normal")
-        data_output.file_slots.new("depth")
-        data_output.file_slots.new("position")
-        data_output.file_slots.new("motion")
+        denoise_nodes = []
+        for index, (_, _, denoise_label) in enumerate(MAIN_DENOISED):
+            denoise_node = nodes.new(type="CompositorNodeDenoise")
+            denoise_node.location = (200, 100 - 100 * index)
+            denoise_node.label = denoise_label
+            denoise_nodes.append(denoise_node)
+
+        # Find the denoising data outputs in a single pass
+        denoising_albedo = denoising_normal = None
+        for output in render_layers.outputs:
+            lower_name = output.name.lower()
+            if "denoising" in lower_name:
+                if "albedo" in lower_name:
+                    denoising_albedo = output
+                elif "normal" in lower_name:
+                    denoising_normal = output
+
+        # All nodes and slots exist now, wire everything up in one go
+        rl_outputs = render_layers.outputs
+        new_link = links.new
+
+        # Connect Image (and Alpha, if present) to Set Alpha, then on to rgba.
+        # Optional outputs are fetched with get() so missing passes are skipped
+        image = rl_outputs['Image']
+        new_link(image, set_alpha.inputs['Image'])
+        alpha = rl_outputs.get('Alpha')
+        if alpha is not None:
+            new_link(alpha, set_alpha.inputs['Alpha'])
+        new_link(set_alpha.outputs['Image'], main_sockets['rgba'])
+
+        # Connect denoising data to all denoise nodes, fanning out from one
+        # reroute per pass instead of wiring each node to the Render Layers
+        if denoising_albedo is not None and denoising_normal is not None:
+            albedo_reroute = nodes.new(type="NodeReroute")
+            albedo_reroute.location = (150, -200)
+            normal_reroute = nodes.new(type="NodeReroute")
+            normal_reroute.location = (150, -230)
+            new_link(denoising_albedo, albedo_reroute.inputs[0])
+            new_link(denoising_normal, normal_reroute.inputs[0])
+            albedo = albedo_reroute.outputs[0]
+            normal = normal_reroute.outputs[0]
+            for denoise_node in denoise_nodes:
+                denoise_inputs = denoise_node.inputs
+                new_link(albedo, denoise_inputs['Albedo'])
+                new_link(normal, denoise_inputs['Normal'])
+
+        # Link direct Main AOVs
+        for output_name, slot_name in MAIN_DIRECT:
+            source = rl_outputs.get(output_name)
+            if source is not None:
+                new_link(source, main_sockets[slot_name])
+
+        # Link indirect passes through their denoise node
+        for (output_name, slot_name, _), denoise_node in zip(MAIN_DENOISED, denoise_nodes):
+            source = rl_outputs.get(output_name)
+            if source is not None:
+                new_link(source, denoise_node.inputs['Image'])
+            new_link(denoise_node.outputs['Image'], main_sockets[slot_name])
+
+        # --- Data AOVs (32-bit) ---
+        data_sockets = {
+            slot_name: _new_slot_socket(data_output, slot_name)
+            for slot_name, _ in DATA_SLOTS
+        }
 
         # Link Data AOVs
-        links.new(render_layers.outputs['Normal'], data_output.inputs['normal'])
-        links.new(render_layers.outputs['Depth'], data_output.inputs['depth'])
-        links.new(render_layers.outputs['Position'], data_output.inputs['position'])
-        links.new(render_layers.outputs['Vector'], data_output.inputs['motion'])
-
-        # --- File Output for Cryptomatte AOVs (32-bit) ---
-        crypto_output = nodes.new(type="CompositorNodeOutputFile")
-        crypto_output.location = (400, -400)
-        crypto_output.base_path = "//renders/crypto.####.exr"  # Use same base name for all outputs
-        crypto_output.format.file_format = 'OPEN_EXR_MULTILAYER'
-        crypto_output.format.color_depth = '32'  # 32-bit float (full)
-        crypto_output.format.color_mode = 'RGBA'
-        crypto_output.label = "Cryptomatte Passes (32-bit)"
-
-        # Clear default slots and add Cryptomatte AOVs
-        crypto_output.file_slots.clear()
-        
-        # Add base Cryptomatte slots and numbered passes
-        crypto_output.file_slots.new("CryptoObject")
-        crypto_output.file_slots.new("CryptoMaterial")
-        crypto_output.file_slots.new("CryptoAsset")
-        
-        # Add numbered passes for each Cryptomatte type
-        for i in range(3):
-            crypto_output.file_slots.new(f"CryptoObject{i:02d}")
-            crypto_output.file_slots.new(f"CryptoMaterial{i:02d}")
-            crypto_output.file_slots.new(f"CryptoAsset{i:02d}")
-
-        # Link main image to base Cryptomatte passes
-        links.new(render_layers.outputs['Image'], crypto_output.inputs['CryptoObject'])
-        links.new(render_layers.outputs['Image'], crypto_output.inputs['CryptoMaterial'])
-        links.new(render_layers.outputs['Image'], crypto_output.inputs['CryptoAsset'])
-
-        # Link numbered Cryptomatte passes directly
-        for i in range(3):
-            links.new(render_layers.outputs[f'CryptoObject{i:02d}'], crypto_output.inputs[f'CryptoObject{i:02d}'])
-            links.new(render_layers.outputs[f'CryptoMaterial{i:02d}'], crypto_output.inputs[f'CryptoMaterial{i:02d}'])
-            links.new(render_layers.outputs[f'CryptoAsset{i:02d}'], crypto_output.inputs[f'CryptoAsset{i:02d}'])
-
-        print("Available outputs:", [output.name for output in render_layers.outputs])
-        self.report({'INFO'}, "VFX AOVs setup complete: Main (16-bit), Data/Crypto (32-bit)")
+        for slot_name, output_name in DATA_SLOTS:
+            source = rl_outputs.get(output_name)
+            if source is not None:
+                new_link(source, data_sockets[slot_name])
+
+        # --- Cryptomatte AOVs (32-bit) ---
+        # Add base Cryptomatte slots, fed from the main image
+        for slot_name in CRYPTO_BASE:
+            new_link(image, _new_slot_socket(crypto_output, slot_name))
+
+        # Add and link the numbered passes for each Cryptomatte type
+        for slot_name in CRYPTO_NUMBERED:
+            socket = _new_slot_socket(crypto_output, slot_name)
+            source = rl_outputs.get(slot_name)
+            if source is not None:
+                new_link(source, socket)
+
+        if bpy.app.debug:
+            print("Available outputs:", [output.name for output in render_layers.outputs])
+
+        # Flush all pass and compositor changes in a single depsgraph update
+        view_layer.update()
+
+        # Remember the resulting state so an identical re-run is a no-op
+        scene['_aov_fingerprint'] = _compute_fingerprint(view_layer, scene, settings)
+
+        if self.unified_output:
+            self.report({'INFO'}, "VFX AOVs setup complete: all passes in one 32-bit EXR")
+        else:
+            self.report({'INFO'}, "VFX AOVs setup complete: Main (16-bit), Data/Crypto (32-bit)")
         return {'FINISHED'}
 
 class VIEWLAYER_PT_aov_setup(Panel):
@@ -1,9 +1,13 @@
 import os
+import hashlib
+import sqlite3
 import tempfile
 import json
+import mmap
+import shutil
 import time
 import modal
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import bpy in a way that works both inside and outside Blender
@@ -11,6 +15,7 @@ try:
     import bpy
     from bpy.props import StringProperty, IntProperty, BoolProperty, EnumProperty, FloatProperty
     from bpy.types import Operator, Panel
+    from bpy.app.handlers import persistent
     INSIDE_BLENDER = True
 except ImportError:
     INSIDE_BLENDER = False
@@ -29,6 +34,22 @@ except ImportError:
         pass
     class Panel:
         pass
+    def persistent(func):
+        return func
+
+# BLAKE3 is optional, asset hashing falls back to MD5 without it
+try:
+    from blake3 import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
+
+# Dropbox is optional, uploads are skipped without it (the render image lacks it)
+try:
+    import dropbox
+    HAS_DROPBOX = True
+except ImportError:
+    HAS_DROPBOX = False
 
 bl_info = {
     "name": "Modal VFX Render Farm",
@@ -47,31 +68,102 @@ app = modal.App("blender-vfx-render-farm")
 assets_volume = modal.Volume.from_name("blender-assets-volume", create_if_missing=True)
 render_volume = modal.Volume.from_name("blender-renders-volume", create_if_missing=True)
 
+# Number of threads copying/uploading finished frames while others still render
+POST_PROCESS_WORKERS = 4
+
+# Most GPU containers a render function runs at once
+MAX_RENDER_CONTAINERS = 10
+
+# Frames rendered per render_frames call. Small enough that results stream back
+# (and a failure only loses a few frames), big enough to reuse persistent data
+FRAMES_PER_BATCH = 4
+
+# Where render_tile writes its partial frames, and where finished renders are
+# kept cached by content, relative to the render volume root
+RENDER_TILE_DIR = "tiles"
+RENDER_CACHE_DIR = "cache"
+
+# Extra rows rendered past each edge of a tile, so the denoisers see the
+# neighbouring pixels and strips don't show seams once merged
+TILE_OVERLAP_ROWS = 32
+
+# Dropbox uploads are streamed in chunks of this size (concurrent upload
+# sessions require a multiple of 4 MiB)
+DROPBOX_CHUNK_SIZE = 8 * 1024 * 1024
+# Files larger than this upload their chunks in parallel
+DROPBOX_PARALLEL_THRESHOLD = 1024 * 1024 * 1024
+DROPBOX_UPLOAD_WORKERS = 4
+
+# File formats merge_tiles can combine, and the only ones the codec override touches
+EXR_FORMATS = {'OPEN_EXR', 'OPEN_EXR_MULTILAYER'}
+
+# Codec used on the render containers for EXR outputs set to no compression.
+# The rendered files are the deliverables, so it has to be lossless. Codecs the
+# user picked are left alone.
+RENDER_EXR_CODEC = 'ZIPS'
+
+def warmup_cycles():
+    """Render a tiny frame of the default scene on the GPU while building the image.
+    
+    The kernel caches this fills end up in the image layer, so cold render
+    containers don't compile them again.
+    """
+    import bpy
+    
+    bpy.ops.wm.read_factory_settings()
+    configure_rendering(bpy.context, with_gpu=True)
+    
+    scene = bpy.context.scene
+    scene.render.resolution_x = 64
+    scene.render.resolution_y = 64
+    scene.render.resolution_percentage = 100
+    scene.cycles.samples = 1
+    bpy.ops.render.render()
+
 # Container images - using Blender 4.3 compatible version
 rendering_image = (
     modal.Image.debian_slim(python_version="3.11")
     .apt_install("xorg", "libxkbcommon0")  # X11 dependencies
     .pip_install("bpy==4.3.0")  # Updated to Blender 4.3
+    .pip_install("OpenEXR>=3.3")  # Merging tiled renders (File(header, channels) API)
+    .run_function(warmup_cycles, gpu="L40S")  # Compile the OptiX kernels once
 )
 
 # Database to track file changes
 class AssetTracker:
     def __init__(self, db_path):
-        import sqlite3
-        import os
-        
         # Ensure directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.conn = sqlite3.connect(db_path)
         self.cursor = self.conn.cursor()
         
+        # The tracker is a cache, so favour write throughput over durability
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        
         # Create table if it doesn't exist
         self.cursor.execute('''
         CREATE TABLE IF NOT EXISTS assets (
             path TEXT PRIMARY KEY,
-            hash TEXT,
-            last_modified REAL
+            hash TEXT,  -- opaque hex digest (BLAKE3 or MD5)
+            last_modified REAL,
+            size INTEGER
+        )
+        ''')
+        
+        # Databases created before the size column was added
+        columns = {row[1] for row in self.cursor.execute("PRAGMA table_info(assets)")}
+        if 'size' not in columns:
+            self.cursor.execute("ALTER TABLE assets ADD COLUMN size INTEGER")
+        
+        # Finished renders on the render volume, keyed by blend file content and frame
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS renders (
+            key TEXT PRIMARY KEY,
+            volume_path TEXT,
+            result TEXT  -- JSON of the render_frames result
         )
         ''')
         self.conn.commit()
@@ -81,31 +173,136 @@ class AssetTracker:
         result = self.cursor.fetchone()
         return result[0] if result else None
     
-    def update_asset(self, path, file_hash, modified_time):
+    def get_asset_meta(self, path):
+        """Return the recorded (hash, last_modified, size) of an asset, or None."""
+        self.cursor.execute("SELECT hash, last_modified, size FROM assets WHERE path = ?", (path,))
+        return self.cursor.fetchone()
+    
+    def update_asset(self, path, file_hash, modified_time, size=None):
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO assets (path, hash, last_modified, size) VALUES (?, ?, ?, ?)",
+            (path, file_hash, modified_time, size)
+        )
+        self.conn.commit()
+    
+    def update_assets_bulk(self, rows):
+        """Insert or replace many (path, hash, last_modified, size) rows in a single commit."""
+        self.cursor.executemany(
+            "INSERT OR REPLACE INTO assets (path, hash, last_modified, size) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        self.conn.commit()
+    
+    def get_render(self, key):
+        """Return the (volume_path, result) recorded for a render key, or None."""
+        self.cursor.execute("SELECT volume_path, result FROM renders WHERE key = ?", (key,))
+        row = self.cursor.fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+    
+    def add_render(self, key, volume_path, result):
         self.cursor.execute(
-            "INSERT OR REPLACE INTO assets (path, hash, last_modified) VALUES (?, ?, ?)",
-            (path, file_hash, modified_time)
+            "INSERT OR REPLACE INTO renders (key, volume_path, result) VALUES (?, ?, ?)",
+            (key, volume_path, json.dumps(result))
         )
         self.conn.commit()
     
     def close(self):
         self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.conn.commit()
+        self.close()
+
+def calculate_file_hash(file_path, multithreaded=True):
+    """Calculate the hash of a file, using BLAKE3 when available and MD5 otherwise.
+    
+    Pass multithreaded=False when already hashing several files in parallel.
+    """
+    if HAS_BLAKE3:
+        with open(file_path, "rb") as f:
+            # mmap can't map empty files
+            if os.fstat(f.fileno()).st_size == 0:
+                return blake3().hexdigest()
+            # Hash straight from the page cache, spread across all cores
+            # unless the caller is already running one hash per core
+            max_threads = blake3.AUTO if multithreaded else 1
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return blake3(mm, max_threads=max_threads).hexdigest()
+    
+    with open(file_path, "rb") as f:
+        # Reads in large chunks in C, releasing the GIL while hashing
+        return hashlib.file_digest(f, "md5").hexdigest()
 
-def calculate_file_hash(file_path):
-    """Calculate MD5 hash of a file."""
-    import hashlib
+def hash_assets(file_paths, tracker=None):
+    """Hash changed files in parallel, returning (path, hash, last_modified, size) rows for AssetTracker.
+    
+    Files whose size and modification time still match the tracker's record are
+    treated as unchanged and skipped without being read.
+    
+    Threads rather than processes: both BLAKE3 and hashlib release the GIL while
+    hashing, and multiprocessing can't re-launch the Blender executable.
+    """
+    changed = []
+    for path in file_paths:
+        stat = os.stat(path)
+        if tracker is not None:
+            meta = tracker.get_asset_meta(path)
+            if meta and meta[1] == stat.st_mtime and meta[2] == stat.st_size:
+                continue
+        changed.append((path, stat))
     
-    md5_hash = hashlib.md5()
+    with ThreadPoolExecutor() as pool:
+        hashes = pool.map(
+            lambda path: calculate_file_hash(path, multithreaded=False),
+            [path for path, _ in changed]
+        )
+        return [
+            (path, file_hash, stat.st_mtime, stat.st_size)
+            for (path, stat), file_hash in zip(changed, hashes)
+        ]
+
+def _upload_session(dbx, file_path, file_size, commit):
+    """Stream a file to Dropbox through an upload session, one chunk at a time."""
     with open(file_path, "rb") as f:
-        # Read in chunks to handle large files
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5_hash.update(chunk)
-    return md5_hash.hexdigest()
+        session_id = dbx.files_upload_session_start(f.read(DROPBOX_CHUNK_SIZE)).session_id
+        cursor = dropbox.files.UploadSessionCursor(session_id=session_id, offset=f.tell())
+        while file_size - f.tell() > DROPBOX_CHUNK_SIZE:
+            dbx.files_upload_session_append_v2(f.read(DROPBOX_CHUNK_SIZE), cursor)
+            cursor.offset = f.tell()
+        dbx.files_upload_session_finish(f.read(DROPBOX_CHUNK_SIZE), cursor, commit)
+
+def _upload_session_parallel(dbx, file_path, file_size, commit):
+    """Upload the chunks of a large file in parallel through a concurrent upload session."""
+    session_id = dbx.files_upload_session_start(
+        b"",
+        session_type=dropbox.files.UploadSessionType.concurrent
+    ).session_id
+    offsets = range(0, file_size, DROPBOX_CHUNK_SIZE)
+    last_offset = offsets[-1]
+    
+    def append_chunk(offset):
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read(DROPBOX_CHUNK_SIZE)
+        cursor = dropbox.files.UploadSessionCursor(session_id=session_id, offset=offset)
+        # The final chunk closes the session
+        dbx.files_upload_session_append_v2(chunk, cursor, close=offset == last_offset)
+    
+    with ThreadPoolExecutor(max_workers=DROPBOX_UPLOAD_WORKERS) as pool:
+        # Consume the results so a failed chunk raises here
+        list(pool.map(append_chunk, offsets))
+    
+    cursor = dropbox.files.UploadSessionCursor(session_id=session_id, offset=file_size)
+    dbx.files_upload_session_finish(b"", cursor, commit)
 
 def upload_to_dropbox(file_path, dropbox_path):
-    """Upload a file to Dropbox."""
-    import dropbox
-    import os
+    """Upload a file to Dropbox, streaming it in chunks when it is larger than one."""
+    if not HAS_DROPBOX:
+        print("Warning: dropbox package not installed, skipping Dropbox upload")
+        return False
     
     # Get Dropbox API token from environment
     api_token = os.environ.get("DROPBOX_API_TOKEN")
@@ -115,17 +312,25 @@ def upload_to_dropbox(file_path, dropbox_path):
     
     try:
         dbx = dropbox.Dropbox(api_token)
+        file_size = os.path.getsize(file_path)
         
-        # Read file
-        with open(file_path, "rb") as f:
-            file_data = f.read()
-        
-        # Upload file
-        dbx.files_upload(
-            file_data,
-            dropbox_path,
-            mode=dropbox.files.WriteMode.overwrite
-        )
+        if file_size <= DROPBOX_CHUNK_SIZE:
+            # Small files fit in a single request
+            with open(file_path, "rb") as f:
+                dbx.files_upload(
+                    f.read(),
+                    dropbox_path,
+                    mode=dropbox.files.WriteMode.overwrite
+                )
+        else:
+            commit = dropbox.files.CommitInfo(
+                path=dropbox_path,
+                mode=dropbox.files.WriteMode.overwrite
+            )
+            if file_size > DROPBOX_PARALLEL_THRESHOLD:
+                _upload_session_parallel(dbx, file_path, file_size, commit)
+            else:
+                _upload_session(dbx, file_path, file_size, commit)
         
         print(f"Uploaded {file_path} to Dropbox at {dropbox_path}")
         return True
@@ -133,49 +338,230 @@ def upload_to_dropbox(file_path, dropbox_path):
         print(f"Error uploading to Dropbox: {str(e)}")
         return False
 
+def download_render(volume_path, local_path):
+    """Stream a file from the render volume to a local path."""
+    with open(local_path, "wb") as f:
+        # Let the Modal client fetch the file's blocks concurrently and write
+        # them straight into the file, rather than looping over chunks here
+        render_volume.read_file_into_fileobj(volume_path, f)
+
 @app.function(
     gpu="L40S",
     image=rendering_image,
     volumes={
         "/assets": assets_volume,
         "/renders": render_volume
-    }
+    },
+    max_containers=MAX_RENDER_CONTAINERS
 )
-def render_frame(blend_file_path: str, frame_number: int = 0) -> dict:
-    """Renders a single frame of a Blender file using compositor settings."""
+def render_frames(blend_file_path: str, frames: list, output_subdirs: list) -> list:
+    """Renders a batch of frames of a Blender file using compositor settings.
+    
+    The blend file is opened and rendering configured once for the whole batch.
+    Each frame's output goes to the matching entry of output_subdirs, relative
+    to the render volume root.
+    """
     import bpy
-    import os
-    from pathlib import Path
 
-    # The blend file is now on the volume
-    input_path = blend_file_path
-    temp_output_dir = "/renders/temp"
-    os.makedirs(temp_output_dir, exist_ok=True)
+    # Open the blend file (now on the volume). The cache handlers aren't
+    # registered in the container, so drop any nodes cached from a previously
+    # opened file
+    bpy.ops.wm.open_mainfile(filepath=blend_file_path)
+    _invalidate_output_node_cache()
+    
+    # Configure GPU rendering
+    configure_rendering(bpy.context, with_gpu=True)
+    
+    results = []
+    for frame_number, output_subdir in zip(frames, output_subdirs):
+        # Start from an empty directory, so files left by an earlier attempt
+        # at this frame aren't recorded as part of this render
+        output_dir = f"/renders/{output_subdir}"
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        
+        # Set the frame
+        bpy.context.scene.frame_set(frame_number)
+        
+        # Render with every File Output node redirected to the frame's directory
+        rendered_files = _render_to_dir(output_dir)
+        
+        # Record the relative paths of all rendered files (under output_dir)
+        results.append({
+            'frame': frame_number,
+            'output_dir': output_subdir,
+            'files': rendered_files
+        })
+    
+    # Make the renders visible to the driver reading them from the volume
+    render_volume.commit()
+    
+    return results
 
-    # Open the blend file
-    bpy.ops.wm.open_mainfile(filepath=input_path)
+@app.function(
+    gpu="L40S",
+    image=rendering_image,
+    volumes={
+        "/assets": assets_volume,
+        "/renders": render_volume
+    },
+    max_containers=MAX_RENDER_CONTAINERS
+)
+def render_tile(blend_file_path: str, frame_number: int, tile_index: int, tile_count: int,
+                output_subdir: str) -> dict:
+    """Renders one horizontal strip of a frame, to be combined by merge_tiles.
     
-    # Set the frame
-    bpy.context.scene.frame_set(frame_number)
+    The strip goes to output_subdir, relative to the render volume root.
+    """
+    import bpy
     
-    # Configure GPU rendering
+    # Start from an empty directory, so files left by an earlier attempt at
+    # this tile aren't picked up as part of this render
+    tile_output_dir = f"/renders/{output_subdir}"
+    shutil.rmtree(tile_output_dir, ignore_errors=True)
+    os.makedirs(tile_output_dir)
+    
+    # Open the blend file. The cache handlers aren't registered in the
+    # container, so drop any nodes cached from a previously opened file
+    bpy.ops.wm.open_mainfile(filepath=blend_file_path)
+    _invalidate_output_node_cache()
+    
+    bpy.context.scene.frame_set(frame_number)
     configure_rendering(bpy.context, with_gpu=True)
     
-    # Store original output paths from File Output nodes
-    original_paths = {}
-    output_nodes = get_file_output_nodes()
+    # Restrict rendering to this tile's rows. The image is not cropped, so every
+    # tile writes full-resolution files and merging is a plain row copy.
+    render = bpy.context.scene.render
+    height = render.resolution_y * render.resolution_percentage // 100
+    row_min, row_max = _tile_rows(height, tile_index, tile_count)
+    # Render some overlap too, merge_tiles only keeps the tile's own rows
+    row_min = max(row_min - TILE_OVERLAP_ROWS, 0)
+    row_max = min(row_max + TILE_OVERLAP_ROWS, height)
+    render.use_border = True
+    render.use_crop_to_border = False
+    render.border_min_x = 0.0
+    render.border_max_x = 1.0
+    # Aim for the middle of the boundary row so float truncation in Blender
+    # lands exactly on it
+    render.border_min_y = min((row_min + 0.5) / height, 1.0) if row_min else 0.0
+    render.border_max_y = min((row_max + 0.5) / height, 1.0)
+    
+    rendered_files = _render_to_dir(tile_output_dir)
+    render_volume.commit()
+    
+    return {
+        'frame': frame_number,
+        'tile': tile_index,
+        'output_dir': output_subdir,
+        'files': rendered_files
+    }
+
+@app.function(
+    image=rendering_image,
+    volumes={
+        "/renders": render_volume
+    }
+)
+def merge_tiles(frame_number: int, tile_results: list, output_subdir: str) -> dict:
+    """Combines the strips written by render_tile into full frames, like a render_frames result.
+    
+    The strips are deleted once merged.
+    """
+    import OpenEXR
+    
+    render_volume.reload()
+    output_dir = f"/renders/{output_subdir}"
+    shutil.rmtree(output_dir, ignore_errors=True)
+    tile_count = len(tile_results)
+    
+    lossy_compressions = {
+        OpenEXR.DWAA_COMPRESSION, OpenEXR.DWAB_COMPRESSION,
+        OpenEXR.B44_COMPRESSION, OpenEXR.B44A_COMPRESSION, OpenEXR.PXR24_COMPRESSION,
+    }
     
-    # Temporarily redirect output to our temp directory
+    merged_files = sorted({rel_path for result in tile_results for rel_path in result['files']})
+    for rel_path in merged_files:
+        merged_header = None
+        merged_channels = None
+        for result in tile_results:
+            tile_path = f"/renders/{result['output_dir']}/{rel_path}"
+            if not os.path.exists(tile_path):
+                continue
+            with OpenEXR.File(tile_path, separate_channels=True) as tile_file:
+                channels = tile_file.channels()
+                if merged_channels is None:
+                    # Start from the first tile, then paste the other tiles' own
+                    # rows in, which also replaces the first tile's overlap
+                    merged_header = tile_file.header()
+                    merged_channels = channels
+                    # The strips were already encoded once, so don't lose more
+                    # detail by encoding the merged frame lossily again
+                    if merged_header.get('compression') in lossy_compressions:
+                        merged_header['compression'] = OpenEXR.ZIP_COMPRESSION
+                    continue
+                for name, channel in channels.items():
+                    # EXR rows run top to bottom, Blender's border bottom to top
+                    height = channel.pixels.shape[0]
+                    row_min, row_max = _tile_rows(height, result['tile'], tile_count)
+                    rows = slice(height - row_max, height - row_min)
+                    merged_channels[name].pixels[rows] = channel.pixels[rows]
+        
+        output_path = os.path.join(output_dir, rel_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        OpenEXR.File(merged_header, merged_channels).write(output_path)
+    
+    # The tiles of a frame share a parent directory, drop it along with them
+    for tile_dir in {os.path.dirname(result['output_dir']) for result in tile_results}:
+        shutil.rmtree(f"/renders/{tile_dir}", ignore_errors=True)
+    render_volume.commit()
+    
+    return {
+        'frame': frame_number,
+        'output_dir': output_subdir,
+        'files': merged_files
+    }
+
+def _split_frames(frames, batch_size):
+    """Split frames into contiguous lists of at most batch_size frames."""
+    return [list(frames[start:start + batch_size]) for start in range(0, len(frames), batch_size)]
+
+def _writes_only_exr(original_paths):
+    """Whether every File Output node and slot in original_paths writes EXR files."""
+    for node_info in original_paths.values():
+        file_formats = [node_info['file_format']]
+        # Multilayer files ignore the slots' own formats
+        if node_info['file_format'] != 'OPEN_EXR_MULTILAYER':
+            file_formats += [
+                slot_info['format']['file_format']
+                for slot_info in node_info['file_slots'] if not slot_info['use_node_format']
+            ]
+        if not all(file_format in EXR_FORMATS for file_format in file_formats):
+            return False
+    return True
+
+def _tile_rows(height, tile_index, tile_count):
+    """Return the [min, max) pixel rows, counted from the bottom, of a horizontal tile."""
+    return height * tile_index // tile_count, height * (tile_index + 1) // tile_count
+
+def get_original_paths(output_nodes):
+    """Get the output paths and slot formats of File Output nodes, keyed by node index.
+    
+    Base paths are made absolute here, so the post-processing threads don't
+    have to touch bpy.
+    """
+    original_paths = {}
     for node_index, node in enumerate(output_nodes):
         original_paths[node_index] = {
-            'base_path': node.base_path,
+            'base_path': bpy.path.abspath(node.base_path),
+            'file_format': node.format.file_format,
             'file_slots': []
         }
         
         # Store original file slots settings
-        for slot_index, slot in enumerate(node.file_slots):
+        for slot in node.file_slots:
             original_paths[node_index]['file_slots'].append({
                 'path': slot.path,
+                'use_node_format': slot.use_node_format,
                 'format': {
                     'file_format': slot.format.file_format,
                     'color_depth': getattr(slot.format, 'color_depth', None),
@@ -183,35 +569,65 @@ def render_frame(blend_file_path: str, frame_number: int = 0) -> dict:
                     'color_mode': getattr(slot.format, 'color_mode', None),
                 }
             })
-        
-        # Redirect output to temp directory
-        node.base_path = temp_output_dir
+    return original_paths
+
+def _iter_files(path):
+    """Yield the paths of all files under path, using scandir's cached entry types."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                yield from _iter_files(entry.path)
+            else:
+                yield entry.path
+
+def _render_to_dir(output_dir):
+    """Render the open scene with every File Output node redirected to output_dir.
+    
+    Each node writes to a subdirectory named after its index in
+    get_file_output_nodes(). Returns the rendered file paths relative to
+    output_dir.
+    """
+    # Temporarily redirect output to the output directory
+    output_nodes = get_file_output_nodes()
+    original_base_paths = [node.base_path for node in output_nodes]
+    for node_index, node in enumerate(output_nodes):
+        node_dir = os.path.join(output_dir, f"{node_index:02d}")
+        if node.format.file_format == 'OPEN_EXR_MULTILAYER':
+            # Multilayer nodes use base_path as the file name prefix
+            node.base_path = os.path.join(node_dir, os.path.basename(node.base_path))
+        else:
+            node.base_path = node_dir
+    
+    # Losslessly compress uncompressed EXRs so fewer bytes go through the volume
+    original_codecs = []
+    for node in output_nodes:
+        for image_format in _output_formats(node):
+            if image_format.file_format in EXR_FORMATS \
+                    and image_format.exr_codec == 'NONE':
+                original_codecs.append((image_format, image_format.exr_codec))
+                image_format.exr_codec = RENDER_EXR_CODEC
     
     # Render
     bpy.ops.render.render(write_still=True)
     
-    # Collect all rendered files
-    rendered_files = {}
-    for root, dirs, files in os.walk(temp_output_dir):
-        for file in files:
-            file_path = os.path.join(root, file)
-            rel_path = os.path.relpath(file_path, temp_output_dir)
-            rendered_files[rel_path] = file_path  # Store the path instead of bytes
+    # Collect the relative paths of all rendered files
+    prefix_length = len(output_dir) + 1
+    rendered_files = [file_path[prefix_length:] for file_path in _iter_files(output_dir)]
     
     # Restore original output paths
-    for node_index, node in enumerate(output_nodes):
-        if node_index in original_paths:
-            node.base_path = original_paths[node_index]['base_path']
-            for slot_index, slot in enumerate(node.file_slots):
-                if slot_index < len(original_paths[node_index]['file_slots']):
-                    slot.path = original_paths[node_index]['file_slots'][slot_index]['path']
+    for node, base_path in zip(output_nodes, original_base_paths):
+        node.base_path = base_path
+    for image_format, exr_codec in original_codecs:
+        image_format.exr_codec = exr_codec
     
-    # Return all rendered files with their relative paths
-    return {
-        'frame': frame_number,
-        'files': rendered_files,
-        'original_paths': original_paths
-    }
+    return rendered_files
+
+def _output_formats(node):
+    """Yield the image formats a File Output node writes with."""
+    yield node.format
+    for slot in node.file_slots:
+        if not slot.use_node_format:
+            yield slot.format
 
 @app.function(
     image=rendering_image,
@@ -223,8 +639,6 @@ def render_frame(blend_file_path: str, frame_number: int = 0) -> dict:
 def prepare_blend_file(blend_file_path: str) -> str:
     """Unpacks and prepares a blend file for rendering, returning the path on the volume."""
     import bpy
-    import os
-    from pathlib import Path
     
     # Create a temporary directory for the blend file
     os.makedirs("/assets/blend_files", exist_ok=True)
@@ -233,8 +647,14 @@ def prepare_blend_file(blend_file_path: str) -> str:
     filename = os.path.basename(blend_file_path)
     volume_blend_path = f"/assets/blend_files/{filename}"
     
-    # Copy the blend file to the volume
-    Path(volume_blend_path).write_bytes(Path(blend_file_path).read_bytes())
+    # Copy the blend file to the volume. Hard-link it when both paths share a
+    # filesystem, otherwise let copyfile do a kernel-side copy (sendfile) rather
+    # than reading the whole file into memory. Saving below writes a new file,
+    # so the link never modifies the source.
+    try:
+        os.link(blend_file_path, volume_blend_path)
+    except OSError:
+        shutil.copyfile(blend_file_path, volume_blend_path)
     
     # Open the blend file
     bpy.ops.wm.open_mainfile(filepath=volume_blend_path)
@@ -247,16 +667,29 @@ def prepare_blend_file(blend_file_path: str) -> str:
     
     return volume_blend_path
 
+# File Output nodes of the open file, cleared whenever the data may have changed.
+# Undo and redo reload the node trees, freeing the cached nodes.
+_OUTPUT_NODE_CACHE = {'nodes': None}
+_OUTPUT_NODE_CACHE_HANDLERS = ('depsgraph_update_post', 'load_post', 'undo_post', 'redo_post')
+
+@persistent
+def _invalidate_output_node_cache(*args):
+    """Drop the cached File Output nodes (depsgraph update / file load / undo / redo handler)."""
+    _OUTPUT_NODE_CACHE['nodes'] = None
+
 def get_file_output_nodes():
-    """Get all File Output nodes from the compositor."""
-    output_nodes = []
-    
-    for scene in bpy.data.scenes:
-        if scene.node_tree and scene.use_nodes:
-            for node in scene.node_tree.nodes:
-                if node.type == 'OUTPUT_FILE':
-                    output_nodes.append(node)
+    """Get all File Output nodes from the compositor.
     
+    The result is cached because the render panel asks for it on every redraw.
+    """
+    output_nodes = _OUTPUT_NODE_CACHE['nodes']
+    if output_nodes is None:
+        output_nodes = [
+            node
+            for scene in bpy.data.scenes if scene.node_tree and scene.use_nodes
+            for node in scene.node_tree.nodes if node.type == 'OUTPUT_FILE'
+        ]
+        _OUTPUT_NODE_CACHE['nodes'] = output_nodes
     return output_nodes
 
 def configure_rendering(ctx, with_gpu: bool):
@@ -266,16 +699,21 @@ def configure_rendering(ctx, with_gpu: bool):
     
     # Use GPU acceleration if available
     if with_gpu:
-        # Updated for Blender 4.3 API
-        ctx.preferences.addons["cycles"].preferences.compute_device_type = "CUDA"
+        # Updated for Blender 4.3 API. OptiX uses the RTX cores for BVH traversal
+        cycles_prefs = ctx.preferences.addons["cycles"].preferences
+        cycles_prefs.compute_device_type = "OPTIX"
         ctx.scene.cycles.device = "GPU"
 
-        # Reload devices to update configuration
-        ctx.preferences.addons["cycles"].preferences.get_devices()
-        for device in ctx.preferences.addons["cycles"].preferences.devices:
-            device.use = True
+        # Reload devices to update configuration, only enabling the OptiX
+        # devices (not the CPU, which would hold back the GPUs)
+        cycles_prefs.get_devices()
+        for device in cycles_prefs.devices:
+            device.use = device.type == "OPTIX"
     else:
         ctx.scene.cycles.device = "CPU"
+    
+    # Keep BVH, textures and other scene data between renders in the same session
+    ctx.scene.render.use_persistent_data = True
 
     # Report rendering devices for debugging
     if "cycles" in ctx.preferences.addons:
@@ -316,12 +754,12 @@ class ModalVFXRenderFarmOperator(Operator):
         description="Use GPU acceleration for rendering"
     )
     
-    max_containers = IntProperty(
-        name="Max Containers",
-        default=10,
+    tile_count = IntProperty(
+        name="Tiles per Frame",
+        default=1,
         min=1,
-        max=100,
-        description="Maximum number of containers to use for rendering"
+        max=16,
+        description="Split each frame into horizontal strips rendered on separate containers"
     )
     
     upload_to_dropbox = BoolProperty(
@@ -344,10 +782,6 @@ class ModalVFXRenderFarmOperator(Operator):
             return {'CANCELLED'}
         
         # Save the current blend file to the submitter folder
-        import os
-        import time
-        from pathlib import Path
-        
         # Create submitter directory if it doesn't exist
         submitter_dir = "/Users/derek/Skunkworks Dropbox/studio/submitter"
         os.makedirs(submitter_dir, exist_ok=True)
@@ -365,117 +799,236 @@ class ModalVFXRenderFarmOperator(Operator):
         # Save current file
         bpy.ops.wm.save_as_mainfile(filepath=temp_blend, copy=True)
         
-        # Initialize asset tracker
+        # The output settings are the same for every frame, so read them here
+        # once instead of sending them back from Modal with each result
+        self._original_paths = get_original_paths(output_nodes)
+        self._fallback_dir = os.path.join(bpy.path.abspath("//"), "modal_render_output")
+        
+        # merge_tiles can only combine EXR strips
+        self._tile_count = self.tile_count
+        if self._tile_count > 1 and not _writes_only_exr(self._original_paths):
+            self.report({'WARNING'}, "Tiled rendering needs EXR outputs, rendering whole frames instead")
+            self._tile_count = 1
+        
+        # Asset tracker database
         db_path = os.path.join(submitter_dir, "asset_tracker.db")
-        tracker = AssetTracker(db_path)
         
         self.report({'INFO'}, "Starting render on Modal. Using File Output nodes from compositor.")
         
         try:
-            # Initialize Modal client
-            with modal.Session() as session:
-                # Prepare the blend file on the volume
-                volume_blend_path = session.app.prepare_blend_file.remote(temp_blend)
+            # Leaving the block commits and closes the tracker, also on errors
+            with AssetTracker(db_path) as tracker:
+                # Record the hashes of the external files the scene depends on,
+                # only re-hashing the ones that changed since the last submit
+                asset_paths = sorted({
+                    path for path in bpy.utils.blend_paths(absolute=True)
+                    if os.path.isfile(path)
+                })
+                tracker.update_assets_bulk(hash_assets(asset_paths, tracker))
                 
-                if self.render_type == 'FRAME':
-                    # Render single frame
-                    frame = context.scene.frame_current
-                    result = session.app.render_frame.remote(
-                        volume_blend_path, 
-                        frame
-                    )
-                    
-                    # Save the rendered files
-                    self._process_rendered_files(result, self.upload_to_dropbox, self.dropbox_folder)
-                    
-                    self.report({'INFO'}, f"Rendered frame {frame} saved to original output paths")
-                    
-                else:
-                    # Determine frame range
-                    if self.render_type == 'ANIMATION':
-                        start = context.scene.frame_start
-                        end = context.scene.frame_end
-                    else:  # RANGE
-                        start = self.start_frame
-                        end = self.end_frame
-                    
-                    # Create frame arguments for parallel rendering
-                    args = [(volume_blend_path, frame) for frame in range(start, end + 1)]
-                    
-                    # Render frames in parallel
-                    results = list(session.app.render_frame.map(args, max_concurrency=self.max_containers))
-                    
-                    # Save all rendered files
-                    for result in results:
-                        self._process_rendered_files(result, self.upload_to_dropbox, self.dropbox_folder)
-                    
-                    self.report({'INFO'}, f"All frames rendered and saved to original output paths")
-            
-            # Close the asset tracker
-            tracker.close()
+                # Renders depend on the blend file and every asset it uses, so a
+                # changed texture or library invalidates the cached frames
+                content_hash = hashlib.md5(calculate_file_hash(temp_blend).encode())
+                for path in asset_paths:
+                    content_hash.update(f"\0{path}\0{tracker.get_asset_hash(path)}".encode())
+                content_hash = content_hash.hexdigest()
+                
+                # Uploads run on their own threads so saving frames never waits on
+                # Dropbox; leaving the block waits for the queued uploads to drain
+                with ThreadPoolExecutor(max_workers=DROPBOX_UPLOAD_WORKERS) as upload_pool, \
+                        modal.Session() as session:
+                    if self.render_type == 'FRAME':
+                        # Render single frame
+                        frames = [context.scene.frame_current]
+                    else:
+                        # Determine frame range
+                        if self.render_type == 'ANIMATION':
+                            start = context.scene.frame_start
+                            end = context.scene.frame_end
+                        else:  # RANGE
+                            start = self.start_frame
+                            end = self.end_frame
+                        frames = range(start, end + 1)
+                
+                    # Render frames in parallel and save each one as soon as it
+                    # comes back, so copies and uploads overlap with the renders
+                    # that are still running
+                    with ThreadPoolExecutor(max_workers=POST_PROCESS_WORKERS) as pool:
+                        futures = [
+                            pool.submit(
+                                self._process_rendered_files,
+                                result, self.upload_to_dropbox, self.dropbox_folder, upload_pool
+                            )
+                            for result in self._render_frames(session, temp_blend, frames, tracker, content_hash)
+                        ]
+                        # Surface any post-processing error
+                        for future in futures:
+                            future.result()
+                
+                    if self.render_type == 'FRAME':
+                        self.report({'INFO'}, f"Rendered frame {frames[0]} saved to original output paths")
+                    else:
+                        self.report({'INFO'}, f"All frames rendered and saved to original output paths")
             
             return {'FINISHED'}
             
         except Exception as e:
             self.report({'ERROR'}, f"Error rendering on Modal: {str(e)}")
-            # Close the asset tracker
-            tracker.close()
             return {'CANCELLED'}
     
-    def _process_rendered_files(self, result, upload_to_dropbox=False, dropbox_folder="/Renders"):
-        """Process rendered files - download from volume and optionally upload to Dropbox."""
-        import os
-        from pathlib import Path
+    def _render_frames(self, session, blend_file_path, frames, tracker, content_hash):
+        """Render frames on Modal, yielding each frame's result as soon as it is available.
+        
+        Frames already rendered from identical inputs are served from the render
+        cache on the volume without calling Modal at all. Render settings live in
+        the blend file, so content_hash (the blend file and its external assets)
+        plus the tiling covers them.
+        """
+        keys = {frame: f"{content_hash}_{frame:04d}_t{self._tile_count}" for frame in frames}
         
-        frame = result['frame']
+        frames_to_render = []
+        for frame in frames:
+            result = self._get_cached_render(tracker, keys[frame])
+            if result is None:
+                frames_to_render.append(frame)
+            else:
+                print(f"Frame {frame} found in render cache")
+                yield result
+        
+        if not frames_to_render:
+            return
+        
+        # Prepare the blend file on the volume
+        volume_blend_path = session.app.prepare_blend_file.remote(blend_file_path)
+        
+        if self._tile_count > 1:
+            results = self._render_tiled(session, volume_blend_path, frames_to_render, keys)
+        else:
+            # Send short contiguous runs of frames, so a container opens the
+            # blend file once per run and reuses its persistent data across
+            # frames, while finished runs still come back during the job
+            args = [
+                (volume_blend_path, bucket, [f"{RENDER_CACHE_DIR}/{keys[frame]}" for frame in bucket])
+                for bucket in _split_frames(frames_to_render, FRAMES_PER_BATCH)
+            ]
+            results = (
+                result
+                for bucket_results in session.app.render_frames.starmap(args, order_outputs=False)
+                for result in bucket_results
+            )
+        
+        for result in results:
+            # A render that wrote nothing must not be served from the cache later
+            if result['files']:
+                tracker.add_render(keys[result['frame']], result['output_dir'], result)
+            else:
+                print(f"Warning: frame {result['frame']} rendered no files")
+            yield result
+    
+    def _get_cached_render(self, tracker, key):
+        """Return the cached result for a render key, if its files are still on the volume."""
+        cached = tracker.get_render(key)
+        if cached is None:
+            return None
+        
+        volume_path, result = cached
+        try:
+            on_volume = {
+                os.path.basename(entry.path.rstrip("/"))
+                for entry in render_volume.listdir(volume_path, recursive=True)
+            }
+        except (FileNotFoundError, modal.exception.NotFoundError):
+            return None
+        if not result['files'] or not all(
+            os.path.basename(rel_path) in on_volume for rel_path in result['files']
+        ):
+            return None
+        
+        return result
+    
+    def _render_tiled(self, session, volume_blend_path, frames, keys):
+        """Render every tile of every frame in parallel, yielding each frame once its tiles are merged."""
+        args = [
+            (volume_blend_path, frame, tile_index, self._tile_count,
+             f"{RENDER_TILE_DIR}/{keys[frame]}/{tile_index:02d}")
+            for frame in frames
+            for tile_index in range(self._tile_count)
+        ]
+        
+        pending_tiles = {}
+        merges = []
+        for tile_result in session.app.render_tile.starmap(args, order_outputs=False):
+            frame = tile_result['frame']
+            frame_tiles = pending_tiles.setdefault(frame, [])
+            frame_tiles.append(tile_result)
+            if len(frame_tiles) == self._tile_count:
+                del pending_tiles[frame]
+                # Merge in the background so tile results keep being collected
+                merges.append(session.app.merge_tiles.spawn(
+                    frame, frame_tiles, f"{RENDER_CACHE_DIR}/{keys[frame]}"
+                ))
+            
+            # Hand back the merges that have already finished
+            running = []
+            for merge in merges:
+                try:
+                    yield merge.get(timeout=0)
+                except (TimeoutError, modal.exception.TimeoutError):
+                    running.append(merge)
+            merges = running
+        
+        for merge in merges:
+            yield merge.get()
+    
+    def _process_rendered_files(self, result, do_upload=False, dropbox_folder="/Renders", upload_pool=None):
+        """Process rendered files - download from volume and optionally upload to Dropbox.
+        
+        Files are streamed from the render volume concurrently. Uploads are queued
+        on upload_pool when given, otherwise they run inline.
+        """
         files = result['files']
-        original_paths = result['original_paths']
+        original_paths = self._original_paths
         
-        # Process each file
-        for rel_path, file_path in files.items():
-            # Determine the original output path
-            original_path = None
+        # Resolve where each file goes. The first directory of a rendered path
+        # is the index of the File Output node that wrote it (see _render_to_dir)
+        destinations = []
+        for rel_path in files:
+            node_dir, _, node_rel_path = rel_path.partition("/")
+            node_info = original_paths.get(int(node_dir)) if node_dir.isdigit() else None
             
-            # Try to match the file to its original output node and slot
-            for node_index, node_info in original_paths.items():
+            if node_info is not None:
                 base_path = node_info['base_path']
-                
-                for slot_info in node_info['file_slots']:
-                    # Replace frame number placeholder with actual frame number
-                    slot_path = slot_info['path'].replace('#', f"{frame:04d}")
-                    
-                    # Construct potential original path
-                    potential_path = os.path.join(base_path, slot_path)
-                    
-                    # Check if this is the right path
-                    if os.path.basename(rel_path) == os.path.basename(slot_path):
-                        original_path = potential_path
-                        break
-                
-                if original_path:
-                    break
-            
-            # If we couldn't determine the original path, use a fallback
-            if not original_path:
-                # Use the relative path directly with the first node's base path
-                if original_paths and 0 in original_paths:
-                    original_path = os.path.join(original_paths[0]['base_path'], rel_path)
-                else:
-                    # Last resort fallback
-                    fallback_dir = os.path.join(bpy.path.abspath("//"), "modal_render_output")
-                    original_path = os.path.join(fallback_dir, rel_path)
+                if node_info['file_format'] == 'OPEN_EXR_MULTILAYER':
+                    # base_path is a file name prefix, the file goes next to it
+                    base_path = os.path.dirname(base_path)
+                original_path = os.path.join(base_path, node_rel_path)
+            else:
+                # Last resort fallback
+                original_path = os.path.join(self._fallback_dir, rel_path)
             
             # Ensure directory exists
             os.makedirs(os.path.dirname(original_path), exist_ok=True)
+            destinations.append((f"{result['output_dir']}/{rel_path}", original_path))
+        
+        def save_file(destination):
+            volume_path, original_path = destination
             
             # Copy the file from the volume to the local path
-            Path(original_path).write_bytes(Path(file_path).read_bytes())
+            download_render(volume_path, original_path)
             print(f"Saved file to {original_path}")
             
             # Upload to Dropbox if requested
-            if upload_to_dropbox:
+            if do_upload:
                 dropbox_path = os.path.join(dropbox_folder, os.path.basename(original_path))
-                upload_to_dropbox(original_path, dropbox_path)
+                if upload_pool is not None:
+                    upload_pool.submit(upload_to_dropbox, original_path, dropbox_path)
+                else:
+                    upload_to_dropbox(original_path, dropbox_path)
+        
+        # Stream the files from the volume in parallel
+        with ThreadPoolExecutor(max_workers=POST_PROCESS_WORKERS) as pool:
+            # Consume the results so a failed download raises here
+            list(pool.map(save_file, destinations))
 
 class ModalVFXRenderFarmPanel(Panel):
     """Panel for Modal VFX Render Farm settings"""
@@ -545,7 +1098,7 @@ class ModalVFXRenderFarmPanel(Panel):
         # Hardware options
         layout.label(text="Hardware Settings:")
         layout.prop(op_props, "gpu_enabled")
-        layout.prop(op_props, "max_containers")
+        layout.prop(op_props, "tile_count")
         
         # Dropbox options
         layout.label(text="Output Settings:")
@@ -556,8 +1109,13 @@ class ModalVFXRenderFarmPanel(Panel):
 def register():
     bpy.utils.register_class(ModalVFXRenderFarmOperator)
     bpy.utils.register_class(ModalVFXRenderFarmPanel)
+    for handler_name in _OUTPUT_NODE_CACHE_HANDLERS:
+        getattr(bpy.app.handlers, handler_name).append(_invalidate_output_node_cache)
 
 def unregister():
+    for handler_name in _OUTPUT_NODE_CACHE_HANDLERS:
+        getattr(bpy.app.handlers, handler_name).remove(_invalidate_output_node_cache)
+    _invalidate_output_node_cache()
     bpy.utils.unregister_class(ModalVFXRenderFarmPanel)
     bpy.utils.unregister_class(ModalVFXRenderFarmOperator)
 